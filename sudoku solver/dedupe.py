@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# (c) 2018 Hyeongjin Kim
+# a script that removes duplicate Sudoku puzzles from corpora and splits the rest into shards
+"""
+Two puzzles are duplicates if one can be turned into the other by relabeling
+the digits, swapping rows within a band, swapping bands, swapping columns
+within a stack, swapping stacks, or transposing; these are the changes that
+keep a Sudoku a Sudoku. Every puzzle is given a canonical form, the smallest
+81 character string (0 for blanks) over all such changes (see canonical for
+the order), so duplicates are exactly the puzzles with equal canonical forms.
+
+The canonical form takes far longer to work out than most puzzles take to
+solve, so it is only worked out where it is needed. Every puzzle is first
+given a cheap invariant, the clue counts of its rows, columns, and boxes and
+the counts of its digits, sorted so that none of the changes above alter
+it. Duplicates always have equal invariants, so a puzzle whose invariant
+is not shared is kept without being canonicalized.
+
+Puzzles are read one at a time and spread over partition files by the hash
+of their invariant. Each partition is deduplicated on its own, so only one
+partition is held in memory at once, canonicalizing (in parallel) only the
+puzzles that share an invariant, and the puzzles left are written out in
+shards of a fixed size.
+
+usage: python3 dedupe.py [-o shards] [-s 1000] [--lines] [--min-clues 17] corpus.txt [more.txt ...]
+"""
+
+from preprocess import sudoku_stream
+import argparse
+import hashlib
+import itertools
+import multiprocessing
+import operator
+import os
+import tempfile
+
+__all__ = ["canonical", "canonical_hash", "invariant", "dedupe"]
+
+_triples = list(itertools.permutations(range(3)))
+# all 1296 ways to order the 9 columns that keep a Sudoku a Sudoku
+_columnOrders = [tuple(3*stack + offset for stack,inStack in zip(stacks,inStacks) for offset in inStack)
+                 for stacks in _triples
+                 for inStacks in itertools.product(_triples, repeat=3)]
+_orderGetters = [operator.itemgetter(*order) for order in _columnOrders]  # row -> tuple in that order
+_blankTable = str.maketrans('0123456789', '0111111111')  # 0 for a blank, 1 for a clue
+
+def _relabel(values, labels):
+    """Returns values (the 9 values of a row, already in column order) with
+    its digits relabeled by labels, adding new digits to labels in order of
+    appearance, along with the (possibly new) labels.
+    """
+    result = ''
+    for value in values:
+        if value != '0' and value not in labels:
+            labels = dict(labels)
+            labels[value] = str(len(labels) + 1)
+        result += labels.get(value, '0')
+    return result, labels
+
+def _choices(rows):
+    """Returns the rows that can be placed after rows, the tuple of rows placed so far."""
+    if len(rows) % 3 == 0:  # the first row of a band can be from any band not used yet
+        usedBands = set(row // 3 for row in rows)
+        return [row for row in range(9) if row // 3 not in usedBands]
+    band = rows[-1] // 3  # the other rows must be from the same band as the row above
+    return [row for row in range(3*band, 3*band + 3) if row not in rows]
+
+def canonical(grid, maxPartials=30000):
+    """Returns the canonical form of grid, a string of 81 values given by row
+    with 0 for blank squares: the smallest such string among all relabelings,
+    row/band/column/stack swaps, and transpositions of grid, where rows are
+    compared first by where their blanks are and only then by their values.
+
+    Rows are placed one at a time. For each way of placing the rows so far
+    (and each column order and labeling) we only keep those that give the
+    smallest row so far, since every other one can only lead to a larger
+    string. Where the blanks of a row are does not depend on the labeling,
+    so most rows are ruled out before they are relabeled.
+
+    Grids with few clues leave many such ways tied, so at most maxPartials of
+    them are kept. The default is above what a solved grid or any of the
+    puzzles in sudoku.txt need. Past it, the result is still a form of grid,
+    but two equal puzzles may no longer get the same form. That only means
+    a duplicate is missed, never that different puzzles are merged.
+
+    >>> grid = next(sudoku_stream('sudoku.txt'))
+    >>> transposed = ''.join(grid[9*column + row] for row in range(9) for column in range(9))
+    >>> relabeled = transposed.translate(str.maketrans('123456789', '987654321'))
+    >>> canonical(grid) == canonical(relabeled[27:54] + relabeled[:27] + relabeled[54:])
+    True
+    >>> canonical(grid)
+    '000000000001002003240560780000000000002003007350680940000070050520308406710405208'
+    >>> len(canonical('1' + '0'*80, maxPartials=1000))
+    81
+    """
+    transposed = ''.join(grid[9*column + row] for row in range(9) for column in range(9))
+    boards = [[board[9*row:9*row + 9] for row in range(9)] for board in (grid, transposed)]
+    blanks = [[row.translate(_blankTable) for row in board] for board in boards]
+    # each partial form is (rows placed, column order, labels, board index)
+    partials = [((), order, dict(), board) for board in range(2) for order in _orderGetters]
+    choices = dict()  # rows placed so far: rows that can be placed next
+    result = ''
+    for depth in range(9):
+        bestBlanks = best = None
+        extended = []
+        for rows,order,labels,board in partials:
+            if rows not in choices:
+                choices[rows] = _choices(rows)
+            for row in choices[rows]:
+                rowBlanks = order(blanks[board][row])
+                if bestBlanks is not None and rowBlanks > bestBlanks:
+                    continue
+                string, newLabels = _relabel(order(boards[board][row]), labels)
+                if bestBlanks is None or rowBlanks < bestBlanks or string < best:
+                    bestBlanks, best = rowBlanks, string
+                    extended = []
+                elif string > best:
+                    continue
+                if len(extended) < maxPartials:
+                    extended.append((rows + (row,), order, newLabels, board))
+        partials = extended
+        result += best
+    return result
+
+def invariant(grid):
+    """Returns a string that is the same for all puzzles that canonical
+    gives the same form, made of the clue counts of the rows and columns of
+    each band and stack, the clue counts of the boxes, and the counts of the
+    digits, each sorted. It is cheap, and usually tells different puzzles apart.
+
+    >>> grid = next(sudoku_stream('sudoku.txt'))
+    >>> transposed = ''.join(grid[9*column + row] for row in range(9) for column in range(9))
+    >>> relabeled = transposed.translate(str.maketrans('123456789', '987654321'))
+    >>> invariant(grid) == invariant(relabeled[27:54] + relabeled[:27] + relabeled[54:])
+    True
+    >>> invariant(grid)
+    '036036266244344344333333455123444455'
+    """
+    rows = [str(9 - grid[9*row:9*row + 9].count('0')) for row in range(9)]
+    columns = [str(9 - grid[column::9].count('0')) for column in range(9)]
+    lines = sorted(''.join(sorted(''.join(sorted(counts[3*band:3*band + 3])) for band in range(3)))
+                   for counts in (rows, columns))
+    boxes = sorted(str(9 - sum(grid[9*row + 3*stack:9*row + 3*stack + 3].count('0')
+                               for row in range(3*band, 3*band + 3)))
+                   for band in range(3) for stack in range(3))
+    digits = sorted(str(grid.count(digit)) for digit in '123456789')
+    return ''.join(lines) + ''.join(boxes) + ''.join(digits)
+
+def _hash(form):
+    return hashlib.sha1(form.encode()).hexdigest()
+
+def canonical_hash(grid):
+    """Returns the SHA-1 hex digest of the canonical form of grid."""
+    return _hash(canonical(grid))
+
+def _partition(form, partitions):
+    return int(_hash(form)[:8], 16) % partitions
+
+def _batches(filenames, size):
+    """Yields lists of at most size puzzles read from filenames in order."""
+    stream = itertools.chain.from_iterable(sudoku_stream(filename) for filename in filenames)
+    batch = list(itertools.islice(stream, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(stream, size))
+
+def _unique(temp, partitions, pool, counts):
+    """Yields the first puzzle of each canonical form, one partition at a time,
+    canonicalizing with pool only the different puzzles that share an invariant.
+
+    counts: dictionary that the number of puzzles canonicalized is added to
+    """
+    for index in range(partitions):
+        with open(os.path.join(temp, '{}.txt'.format(index)), 'r') as file:
+            puzzles = [line.split() for line in file]
+        distinct = dict()  # invariant: the different puzzles with it, in order
+        for key,grid in puzzles:
+            distinct.setdefault(key, dict())[grid] = None
+        grids = [grid for group in distinct.values() if len(group) > 1 for grid in group]
+        forms = dict(zip(grids, pool.map(canonical, grids, chunksize=16)))
+        counts['canonicalized'] += len(grids)
+        seen = set()
+        for key,grid in puzzles:
+            # a puzzle alone with its invariant can only be a duplicate of
+            # itself, so it stands for its own canonical form
+            form = forms.get(grid, grid)
+            if form not in seen:
+                seen.add(form)
+                yield grid
+
+def _writeShards(grids, directory, shardSize, lines):
+    """Writes grids to files of shardSize puzzles each in directory, either one
+    per line or with 'Grid [number]' headings as read by sudoku_data.
+
+    result: (number of puzzles, number of shards)
+    """
+    count = shards = 0
+    while True:
+        shard = list(itertools.islice(grids, shardSize))
+        if not shard:
+            return count, shards
+        with open(os.path.join(directory, 'shard-{:05d}.txt'.format(shards)), 'w') as file:
+            for number,grid in enumerate(shard, 1):
+                if lines:
+                    file.write(grid + '\n')
+                else:
+                    file.write('Grid {:02d}\n'.format(number))
+                    file.write(''.join(grid[9*row:9*row + 9] + '\n' for row in range(9)))
+        count += len(shard)
+        shards += 1
+
+def dedupe(filenames, directory='shards', shardSize=1000, partitions=64,
+           processes=None, batchSize=10000, lines=False, minClues=0):
+    """Reads the puzzles in filenames, drops every puzzle whose canonical form
+    was already seen, and writes the rest to shards in directory. Only the
+    puzzles that share their invariant with a different puzzle are canonicalized.
+
+    filenames: list of txt files of Sudoku puzzles, as read by sudoku_stream
+    directory: the directory to write the shards to
+    shardSize: the number of puzzles in each shard
+    partitions: the number of partition files; memory use is about one
+                partition's worth of puzzles
+    processes: the number of processes to canonicalize with, all CPUs by default
+    batchSize: the number of puzzles read in at once
+    lines: write one puzzle per line instead of with 'Grid [number]' headings
+    minClues: puzzles with fewer clues are rejected (left out of the shards)
+              without being canonicalized, since with fewer than 17 clues they
+              cannot have a unique solution; 0 (the default) keeps every puzzle
+    result: dictionary of the number of puzzles 'read', 'rejected', 'canonicalized',
+            'unique' puzzles, and 'shards'
+    """
+    os.makedirs(directory, exist_ok=True)
+    counts = {'read': 0, 'rejected': 0, 'canonicalized': 0}
+    with tempfile.TemporaryDirectory() as temp:
+        files = [open(os.path.join(temp, '{}.txt'.format(index)), 'w') for index in range(partitions)]
+        try:
+            for batch in _batches(filenames, batchSize):
+                kept = [grid for grid in batch if 81 - grid.count('0') >= minClues]
+                counts['read'] += len(batch)
+                counts['rejected'] += len(batch) - len(kept)
+                for grid in kept:
+                    key = invariant(grid)
+                    files[_partition(key, partitions)].write(key + ' ' + grid + '\n')
+        finally:
+            for file in files:
+                file.close()
+        with multiprocessing.Pool(processes) as pool:
+            counts['unique'], counts['shards'] = _writeShards(_unique(temp, partitions, pool, counts),
+                                                              directory, shardSize, lines)
+    return counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Remove duplicate Sudoku puzzles and split the rest into shards.")
+    parser.add_argument('filenames', nargs='+', help="txt files of Sudoku puzzles")
+    parser.add_argument('-o', '--output', default='shards', help="directory to write the shards to")
+    parser.add_argument('-s', '--shard-size', type=int, default=1000, help="number of puzzles per shard")
+    parser.add_argument('-p', '--partitions', type=int, default=64, help="number of partition files")
+    parser.add_argument('-j', '--processes', type=int, default=None, help="number of processes")
+    parser.add_argument('--lines', action='store_true', help="write one puzzle per line")
+    parser.add_argument('--min-clues', type=int, default=0,
+                        help="leave out puzzles with fewer clues (17 for only those that can have a unique solution)")
+    args = parser.parse_args()
+    result = dedupe(args.filenames, args.output, args.shard_size, args.partitions,
+                    args.processes, lines=args.lines, minClues=args.min_clues)
+    print("Read {read} puzzles, rejected {rejected} with too few clues, canonicalized {canonicalized}, "
+          "wrote {unique} unique puzzles in {shards} shards.".format(**result))
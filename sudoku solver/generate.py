@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# (c) 2018 Hyeongjin Kim
+# a script that writes out fastpath.py, the solving techniques written out for every square
+"""
+The board never changes shape, so instead of looking up peers[point] and
+boxes[point] and looping over them on every pass, this script writes out
+straight-line versions of eliminate and slicing with every square and its
+peers given by name. Running this script writes fastpath.py next to it,
+which solver.py uses whenever it is there and was written for the current
+solver.fastpathVersion; otherwise solver.py uses its own versions of the
+techniques, which give the same results.
+"""
+
+from module import squares, peers, boxes
+from solver import fastpathVersion
+import os
+
+__all__ = ["source", "write", "agree"]
+
+_squares = squares()
+_peers = peers()
+_boxes = boxes()
+
+def eliminateSource():
+    """Returns the source of eliminate(candidates), the Single Possibility Rule
+    with the solved squares found up front and their peers written out.
+
+    result: list of lines
+    """
+    lines = ["def eliminate(candidates):",
+             "    c = candidates"]
+    # the solved squares are the ones solved BEFORE any elimination, as in Solver.eliminate
+    for i,point in enumerate(_squares):
+        lines.append("    s{} = len(c[{!r}]) == 1".format(i, point))
+    for i,point in enumerate(_squares):
+        lines.append("    if s{}:".format(i))
+        lines.append("        v = c[{!r}]".format(point))
+        for peer in sorted(_peers[point]):
+            lines.append("        c[{0!r}] = c[{0!r}].replace(v,'')".format(peer))
+    lines.append("    return c")
+    return lines
+
+def slicingSource():
+    """Returns the source of slicing(candidates), the Slicing Dicing / Hidden
+    Singles Method with the 8 other squares of each box written out.
+
+    result: list of lines
+    """
+    lines = ["def slicing(candidates):",
+             "    c = candidates"]
+    for point in _squares:
+        others = ' + '.join("c[{!r}]".format(box) for box in sorted(_boxes[point]))
+        lines.append("    s = {}".format(others))
+        lines.append("    for v in c[{!r}]:".format(point))
+        lines.append("        if v not in s:")
+        lines.append("            c[{!r}] = v".format(point))
+    lines.append("    return c")
+    return lines
+
+def source():
+    """Returns the source of the fastpath module.
+
+    result: string
+    """
+    lines = ["# generated by generate.py, do not edit",
+             "# straight-line versions of the solving techniques in solver.py",
+             "",
+             "__all__ = [\"eliminate\", \"slicing\"]",
+             "",
+             "GENERATOR = {!r}  # the solver.fastpathVersion this was written for".format(fastpathVersion),
+             ""]
+    lines += eliminateSource() + [""] + slicingSource()
+    return '\n'.join(lines) + '\n'
+
+def write(filename=None):
+    """Writes the fastpath module to filename, fastpath.py next to this
+    script by default. Solver only loads it while its fastpathVersion is unchanged.
+
+    result: the filename written to
+
+    >>> import os, tempfile, solver
+    >>> filename = write(os.path.join(tempfile.mkdtemp(), 'fastpath.py'))
+    >>> solver._loadFastpath(filename) is not None
+    True
+    >>> with open(filename, 'w') as file:
+    ...     _ = file.write(source().replace('GENERATOR = {!r}'.format(solver.fastpathVersion), 'GENERATOR = 0'))
+    >>> solver._loadFastpath(filename) is None
+    True
+    """
+    if filename is None:
+        filename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fastpath.py')
+    with open(filename, 'w') as file:
+        file.write(source())
+    return filename
+
+def agree(filename='sudoku.txt'):
+    """Returns True if the generated techniques give the same candidates as
+    the ones in solver.py after every pass on every puzzle in filename.
+
+    >>> agree()
+    True
+    """
+    from preprocess import sudoku_data
+    from solver import Solver, kandidates
+    fastpath = dict()
+    exec(source(), fastpath)
+    generic = Solver(generated=False)
+    for db in sudoku_data(filename):
+        candidates = kandidates(db)
+        for _ in range(generic.passes):
+            before = dict(candidates)
+            for name in generic.techniques:
+                expected = getattr(generic, name)(dict(candidates))
+                if name in fastpath:
+                    if fastpath[name](dict(candidates)) != expected:
+                        return False
+                candidates = expected
+            if candidates == before:
+                break
+    return True
+
+# Running this as a script writes fastpath.py and then tests it:
+if __name__ == '__main__':
+    print("Wrote {}".format(write()))
+    from doctest import testmod
+    testmod()
@@ -54,4 +54,47 @@ def sudoku_process(string):
     for row,i in zip(rows,range(0,9)):
         for column,j in zip(columns,range(0,9)):
             result[row+column] = str(db[9*i+j])
-    return result
\ No newline at end of file
+    return result
+
+def sudoku_stream(filename='sudoku.txt'):
+    """This method reads in Sudoku puzzles from txt file one
+    at a time, so that large files need not fit in memory.
+    The file may be of the form read by sudoku_data, or have
+    each puzzle on a single line of 81 values by row, with
+    0 or . for blank squares. Any other line is skipped, and
+    so is a 'Grid [number]' heading not followed by 9 rows of
+    9 values, so that one bad line never shifts the puzzles
+    after it.
+
+    filename: txt file of Sudoku puzzles
+    result: generator of strings of 81 values by row
+
+    >>> import os, tempfile
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'puzzles.txt')
+    >>> with open(filename, 'w') as file:
+    ...     _ = file.write('puzzle,comment\\n' + '1'*40 + '\\n' + '.'*80 + '2\\n'
+    ...                    + 'Grid 01\\n' + '003020600\\n'*3 + 'Grid 02\\n' + '000000003\\n'*9)
+    >>> [grid[-3:] for grid in sudoku_stream(filename)]
+    ['002', '003']
+    """
+    with open(filename, 'r') as file:
+        rows = None  # the rows read so far after a 'Grid' heading
+        for row in file:
+            row = row.strip()
+            if row[:1] == "G":
+                rows = []
+                continue
+            if rows is not None and len(row) == 9 and row.isdigit():
+                rows.append(row)
+                if len(rows) == 9:
+                    yield ''.join(rows)
+                    rows = None
+                continue
+            rows = None
+            if len(row) == 81 and all(value in '0123456789.' for value in row):
+                yield row.replace('.', '0')
+
+# The following code tests these tools when run as a script:
+if __name__ == '__main__':
+    from doctest import testmod
+    testmod()
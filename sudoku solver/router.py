@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# (c) 2018 Hyeongjin Kim
+# a script for the Router class, which sends each Sudoku to the cheapest Solver for it
+
+from solver import Solver, isSolved
+import threading  # used in guarding the statistics of a shared Router
+
+__all__ = ["Router"]
+
+class Router(object):
+    """This is a Router class that sorts each Sudoku puzzle into one of three
+    routes and solves it with the Solver for that route:
+
+    'singles': only eliminate and slicing, which is enough for easy puzzles
+    'full': all of the solving techniques
+    'search': all of the solving techniques, guessing whenever they get stuck
+
+    To sort a puzzle, the Router counts its clues and runs eliminate and
+    slicing on it (the probe, a Solver of its own so that probing does not
+    count as solving in the statistics of the 'singles' Solver). If the probe
+    solves the puzzle we are done; if it ran out of passes while still making
+    progress the puzzle stays on 'singles'. If it stalled, the density of the candidates left (the average number
+    of candidates per square) decides between 'full' and 'search'. The probe
+    is cheap because eliminate and slicing get stuck within a few passes.
+
+    A puzzle that its Solver cannot finish is passed on to the next route,
+    carrying on from the candidates reached so far; this is counted as
+    escalated in the statistics.
+
+    A puzzle that 'search' cannot solve within its guesses is given up on and
+    counted as unsolved, so that no single puzzle holds on to a worker.
+
+    minClues: puzzles with fewer clues go straight to 'search'
+    probePasses: the most number of passes of the probe
+    searchDensity: stuck puzzles with at least this density go to 'search'
+    guesses: the most number of guesses of the 'search' Solver on one puzzle
+
+    >>> from preprocess import sudoku_data, sudoku_process
+    >>> router = Router()
+    >>> sum(router.solve(db) is not None for db in sudoku_data())
+    50
+    >>> stats = router.stats()
+    >>> stats['singles'], stats['full'], stats['search'], stats['escalated']
+    (32, 17, 1, 2)
+    >>> board = '.....5.8....6.1.43..........1.5........1.6...3.......553.....61........4.........'
+    >>> router.classify(sudoku_process(board.replace('.', '0')))
+    'search'
+    >>> router.solve(sudoku_process(board.replace('.', '0'))) is None
+    True
+    >>> stats = router.stats()
+    >>> stats['solved'], stats['unsolved'], stats['escalated']
+    (50, 1, 2)
+
+    Grid 07 stalls on the third pass of the probe, which is not the same as
+    still making progress on it, and classifying it solves nothing:
+
+    >>> router = Router(probePasses=3)
+    >>> router.classify(sudoku_data()[6])
+    'full'
+    >>> stats = router._solvers['singles'].stats()
+    >>> stats['solved'], stats['unsolved']
+    (0, 0)
+    """
+    routeNames = ('singles', 'full', 'search')
+
+    def __init__(self, minClues=17, probePasses=30, searchDensity=3.0, guesses=100):
+        self.minClues = minClues
+        self.probePasses = probePasses
+        self.searchDensity = searchDensity
+        self.guesses = guesses
+        self._probe = Solver(techniques=('eliminate', 'slicing'), passes=probePasses)
+        self._solvers = {'singles': Solver(techniques=('eliminate', 'slicing'), passes=probePasses),
+                         'full': Solver(),
+                         'search': Solver(engine='search', guesses=guesses)}
+        self._lock = threading.Lock()
+        self._stats = dict((name, 0) for name in self.routeNames)
+        self._stats.update({'escalated': 0, 'solved': 0, 'unsolved': 0})
+
+    def stats(self):
+        """Returns a copy of the statistics of this Router: the number of
+        puzzles sent to each route, the number escalated to a later route,
+        and the number of solved and unsolved puzzles.
+
+        result: dictionary
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, route, escalated, solved):
+        with self._lock:
+            self._stats[route] += 1
+            self._stats['escalated'] += escalated
+            self._stats['solved' if solved else 'unsolved'] += 1
+
+    def _classify(self, db):
+        """Returns the route for db along with the candidates of the probe,
+        or the original db if the probe was not run.
+        """
+        clues = sum(1 for value in db.values() if value != '0')
+        if clues < self.minClues:
+            return 'search', db
+        candidates, count, stalled = self._probe.run(db)
+        if isSolved(candidates) or not stalled:
+            return 'singles', candidates
+        density = sum(len(value) for value in candidates.values()) / len(candidates)
+        return ('search' if density >= self.searchDensity else 'full'), candidates
+
+    def classify(self, db):
+        """Returns the name of the route that db would be sent to.
+
+        db: initial Sudoku dictionary processed from sudoku_data method
+        result: string from Router.routeNames
+        """
+        return self._classify(db)[0]
+
+    def solve(self, db):
+        """Attempts to solve the Sudoku db with the Solver of its route,
+        passing it on to the next route whenever the Solver gets stuck.
+
+        db: initial Sudoku dictionary processed from sudoku_data method
+        result: solved sudoku if solved else None
+        """
+        route, candidates = self._classify(db)
+        solved = isSolved(candidates)
+        escalated = 0  # the number of times the puzzle was passed on
+        for name in self.routeNames[self.routeNames.index(route):]:
+            if solved:
+                break
+            if name != route:
+                escalated += 1
+            candidates = self._solvers[name].run(candidates)[0]
+            solved = isSolved(candidates)
+        self._record(route, escalated, solved)
+        return candidates if solved else None
+
+# The following code tests the Router when run as a script:
+if __name__ == '__main__':
+    from doctest import testmod
+    testmod()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# (c) 2018 Hyeongjin Kim
+# a script for the Session class, which keeps a Sudoku's candidates between edits
+
+from solver import Solver, squares, peers, isSolved, isConsistent
+from module import units
+
+__all__ = ["Session"]
+
+_digits = '123456789'
+_units = dict((point, [tuple(unit) for unit in pointUnits]) for point,pointUnits in units().items())
+
+class Session(object):
+    """This is a Session class that keeps the possible candidates of a
+    Sudoku board while single squares are filled in or cleared, so that
+    an edit only does the work around the square that was edited.
+
+    Internally a square is solved if it was filled in (a given) or if its
+    peers left it only one possible candidate (a deduced square). Every
+    other square has as candidates exactly the values not used by its solved
+    peers. For each deduced square we remember one solved peer for each value
+    it cannot be (givens first), and the other way around which deduced
+    squares each solved square supports, so that clearing a given only takes
+    back the deductions that depended on it. An edit that leaves the rows,
+    columns, or boxes it changed inconsistent (such as a value repeated in a
+    row) rebuilds the candidates from the givens.
+
+    db: initial Sudoku dictionary processed from sudoku_data method
+    solver: the Solver used by solve and hint
+
+    >>> from preprocess import sudoku_data
+    >>> db = sudoku_data()[6]
+    >>> session = Session(db)
+    >>> original = session.candidates()
+    >>> print(session)
+    Session of 26 givens, 2 deduced squares
+    >>> session['A1'], session['I1']
+    ('17', '5')
+    >>> changes = session.place('A1', '1')
+    >>> print(session)
+    Session of 27 givens, 6 deduced squares
+    >>> session.candidates() == Session(dict(db, A1='1')).candidates()
+    True
+    >>> changes = session.clear('A1')
+    >>> session.candidates() == original
+    True
+
+    Overwriting a deduced square, even with a value that breaks the board,
+    gives the same candidates as starting over with that value given:
+
+    >>> changes = session.place('I1', '1')
+    >>> session.candidates() == Session(dict(db, I1='1')).candidates()
+    True
+    >>> changes = session.clear('I1')
+    >>> session.candidates() == original
+    True
+
+    Clearing a square of a filled board only recomputes its row, column,
+    and box, which leave it a single candidate:
+
+    >>> filled = Session(Solver(engine='search').solve(db))
+    >>> filled.clear('E5')
+    {}
+    >>> print(filled)
+    Session of 80 givens, 1 deduced squares
+
+    And any sequence of edits gives the same candidates as starting over:
+
+    >>> import random
+    >>> random.seed(0)
+    >>> givens = dict(db)
+    >>> for _ in range(200):
+    ...     point, value = random.choice(squares), random.choice(_digits)
+    ...     if givens[point] != '0' and random.random() < 0.5:
+    ...         changes, givens[point] = session.clear(point), '0'
+    ...     else:
+    ...         changes, givens[point] = session.place(point, value), value
+    ...     assert session.candidates() == Session(givens).candidates(), point
+    """
+    def __init__(self, db, solver=None):
+        self._solver = solver if solver is not None else Solver()
+        self._givens = dict((point, str(db[point])) for point in squares)
+        self._rebuild()
+
+    def _rebuild(self):
+        """Works out all of the candidates from the givens alone."""
+        self._support = dict()  # deduced square: {value it cannot be: solved peer with that value}
+        self._dependents = dict()  # solved square: set of deduced squares it supports
+        self._order = dict()  # deduced square: when it was deduced, always later than its support
+        self._deductions = 0
+        self._candidates = dict(self._givens)
+        for point in squares:
+            if self._givens[point] == '0':
+                self._candidates[point] = self._allowed(point)
+        self._propagate([point for point in squares
+                         if self._givens[point] == '0' and len(self._candidates[point]) == 1], dict())
+        self._consistent = isConsistent(self._candidates)
+
+    def _isConsistentAround(self, changes):
+        """Returns isConsistent for only the rows, columns, and boxes of the
+        squares in changes that were solved or left without candidates,
+        since only those can make a consistent board inconsistent.
+        """
+        for unit in set(unit for point,value in changes.items() if len(value) < 2 for unit in _units[point]):
+            values = [self._candidates[point] for point in unit if len(self._candidates[point]) < 2]
+            if '' in values or len(set(values)) != len(values):
+                return False
+        return True
+
+    def _checked(self, point, previous, changes):
+        """Returns changes, unless the edit of point (which was previous)
+        left the board inconsistent: then which squares get deduced depends
+        on the order of the deductions, so the candidates are rebuilt from
+        the givens to match a new Session.
+        """
+        if self._consistent and self._isConsistentAround(changes):
+            return changes
+        # the board before the edit was always the same as rebuilt from its givens
+        given, self._givens[point] = self._givens[point], previous
+        self._rebuild()
+        before = self._candidates
+        self._givens[point] = given
+        self._rebuild()
+        return dict((point, value) for point,value in self._candidates.items() if before[point] != value)
+
+    def __getitem__(self, point):
+        return self._candidates[point]
+
+    def __str__(self):
+        return "Session of {} givens, {} deduced squares".format(
+            sum(value != '0' for value in self._givens.values()), len(self._support))
+
+    def _isSolvedPoint(self, point):
+        return self._givens[point] != '0' or point in self._support
+
+    def _allowed(self, point):
+        """Returns the string of values not used by any solved peer of point."""
+        used = ''.join(self._candidates[peer] for peer in peers[point]
+                       if self._givens[peer] != '0' or peer in self._support)
+        return ''.join(value for value in _digits if value not in used)
+
+    def _deduce(self, point):
+        support = dict()  # value: a solved peer with that value
+        # givens first, since a given is only retracted when cleared itself
+        for peer in peers[point]:
+            if self._givens[peer] != '0':
+                support.setdefault(self._givens[peer], peer)
+        if len(support) < 8:
+            for peer in peers[point]:
+                if peer in self._support:
+                    support.setdefault(self._candidates[peer], peer)
+        self._support[point] = support
+        self._order[point] = self._deductions
+        self._deductions += 1
+        for peer in support.values():
+            self._dependents.setdefault(peer, set()).add(point)
+
+    def _forget(self, point):
+        """Marks point as no longer deduced."""
+        self._order.pop(point, None)
+        for peer in self._support.pop(point, dict()).values():
+            dependents = self._dependents.get(peer)
+            if dependents is not None:
+                dependents.discard(point)
+
+    def _resupport(self, point, lost):
+        """Replaces every peer in lost that supports the deduced square point
+        with another solved peer of the same value, if there is one: a given,
+        or a square deduced before point (so that no square ever ends up
+        depending on itself).
+
+        result: True if point is still supported, else False
+        """
+        support = self._support[point]
+        order = self._order[point]
+        for value,peer in list(support.items()):
+            if peer not in lost:
+                continue
+            for other in peers[point]:
+                if other in lost or self._candidates[other] != value:
+                    continue
+                if self._givens[other] != '0' or (other in self._support and self._order[other] < order):
+                    support[value] = other
+                    self._dependents.setdefault(other, set()).add(point)
+                    break
+            else:
+                return False
+        return True
+
+    def _propagate(self, queue, changes):
+        """Removes the value of each solved square in queue from its unsolved
+        peers, deducing (and queueing) any peer that is left with one value.
+        Deduced squares in queue must not be in self._support yet.
+
+        changes: dictionary that the changed squares are recorded in
+        result: changes
+        """
+        for point in queue:
+            if self._givens[point] == '0':
+                self._deduce(point)
+        while queue:
+            point = queue.pop()
+            value = self._candidates[point]
+            for peer in peers[point]:
+                if self._isSolvedPoint(peer) or value not in self._candidates[peer]:
+                    continue
+                self._candidates[peer] = self._candidates[peer].replace(value, '')
+                changes[peer] = self._candidates[peer]
+                if len(self._candidates[peer]) == 1:
+                    self._deduce(peer)
+                    queue.append(peer)
+        return changes
+
+    def _retract(self, points):
+        """Marks every square in points (unless given) and every deduced square
+        depending on them (and on no given of the same value) as unsolved,
+        then recomputes those squares and their peers.
+
+        result: dictionary of changed squares and their new candidates
+        """
+        retracted = set(points)
+        queue = list(points)
+        while queue:
+            for point in self._dependents.pop(queue.pop(), ()):
+                if point not in retracted and not self._resupport(point, retracted):
+                    retracted.add(point)
+                    queue.append(point)
+        for point in retracted:
+            self._forget(point)
+        region = set(retracted)
+        for point in retracted:
+            region.update(peers[point])
+        changes = dict()
+        for point in region:
+            if self._isSolvedPoint(point):
+                continue
+            allowed = self._allowed(point)
+            if allowed != self._candidates[point]:
+                self._candidates[point] = allowed
+                changes[point] = allowed
+        queue = [point for point in region
+                 if not self._isSolvedPoint(point) and len(self._candidates[point]) == 1]
+        return self._propagate(queue, changes)
+
+    def place(self, point, value):
+        """Fills in point with value and removes value from the candidates
+        of its peers, and so on from any peer left with a single candidate.
+
+        result: dictionary of changed squares and their new candidates
+        """
+        value = str(value)
+        assert point in self._givens, "The value must be inside the Sudoku board!"
+        assert len(value) == 1 and value in _digits, "The value must be between 1 and 9 (inclusive)."
+        previous = self._givens[point]
+        replaced = self._isSolvedPoint(point) and self._candidates[point] != value
+        # point becomes a given BEFORE any retracting, so that it is never
+        # deduced again with its old value
+        self._forget(point)
+        self._givens[point] = value
+        self._candidates[point] = value
+        changes = dict()
+        if replaced:  # take back what followed from the old value, and recompute its peers
+            changes.update(self._retract([point]))
+        changes[point] = value
+        return self._checked(point, previous, self._propagate([point], changes))
+
+    def clear(self, point):
+        """Clears the given value in point, taking back only the deductions
+        that depended on it.
+
+        result: dictionary of changed squares and their new candidates
+        """
+        assert point in self._givens, "The value must be inside the Sudoku board!"
+        if self._givens[point] == '0':
+            return dict()
+        previous = self._givens[point]
+        self._givens[point] = '0'
+        return self._checked(point, previous, self._retract([point]))
+
+    def candidates(self):
+        """Returns a copy of the dictionary of possible candidates."""
+        return dict(self._candidates)
+
+    def isSolved(self):
+        return isSolved(self._candidates)
+
+    def solve(self):
+        """Runs the Solver from the kept candidates instead of from the givens.
+
+        result: solved sudoku if solved else None
+        """
+        return self._solver.solve(self.candidates())
+
+    def hint(self):
+        """Returns the next logical step from the kept candidates, see Solver.next_hint."""
+        return self._solver.next_hint(self._candidates)
+
+# The following code tests the Session when run as a script:
+if __name__ == '__main__':
+    from doctest import testmod
+    testmod()
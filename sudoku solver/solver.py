@@ -3,9 +3,13 @@
 # a script to solve (or attempt to solve) Sudoku
 
 from module import *  # importing useful data structures from module
+from module import unitList
 import ast  # used in evaluating a string repr of a list
+import threading  # used in guarding the statistics of a shared Solver
+import itertools  # used in counting passes when there is no limit
+import importlib.util, os  # used in loading fastpath.py
 
-__all__ = ["solve", "safesolve", "countsolve"]
+__all__ = ["Solver", "solve", "safesolve", "countsolve", "next_hint"]
 
 squares = squares()  # list of 81 squares/points
 peers = peers()  # dictionary of peers
@@ -13,6 +17,76 @@ boxes = boxes()  # dictionary of squares in boxes
 _rows = 'ABCDEFGHI'
 _columns = '123456789'
 
+# The subgroup tables are built once here rather than on every pass; each entry is
+# (list of 3 subgroup points, tuple of 6 other squares in line, tuple of 6 other squares in box)
+_subgroupsRows = [(ast.literal_eval(subrow), tuple(rest), tuple(boxgroupsRows()[subrow]))
+                  for subrow,rest in subgroupsRows().items()]
+_subgroupsColumns = [(ast.literal_eval(subcolumn), tuple(rest), tuple(boxgroupsColumns()[subcolumn]))
+                     for subcolumn,rest in subgroupsColumns().items()]
+_rowDict = rowDict()
+_columnDict = columnDict()
+_peerList = {point: sorted(peers[point]) for point in squares}  # peers in a fixed order
+_units = [tuple(unit) for unit in unitList()]  # 9 rows, 9 columns, then 9 boxes
+
+def _siblings(subgroups):
+    """Returns, for each subgroup in subgroups (built as _subgroupsRows), the
+    indices of the 2 other subgroups in its row/column and of the 2 other
+    subgroups in its box, so that next_hint can put together their candidates
+    from the 3-square subgroups alone.
+    """
+    result = []
+    for subgroup,linegroup,boxgroup in subgroups:
+        inLine = [i for i,other in enumerate(subgroups) if set(other[0]) <= set(linegroup)]
+        inBox = [i for i,other in enumerate(subgroups) if set(other[0]) <= set(boxgroup)]
+        result.append((inLine, inBox))
+    return result
+
+_siblingsRows = _siblings(_subgroupsRows)
+_siblingsColumns = _siblings(_subgroupsColumns)
+
+_directory = os.path.dirname(os.path.abspath(__file__))
+
+# generate.py writes this into fastpath.py as GENERATOR; change it whenever the
+# techniques here or the code generate.py writes for them change, so that an
+# older fastpath.py is not used
+fastpathVersion = 1
+
+def _loadFastpath(filename=os.path.join(_directory, 'fastpath.py')):
+    """Returns the fastpath module written by generate.py from filename
+    (next to this script by default), or None if there is none, it cannot
+    be loaded, or it was written for a different fastpathVersion.
+
+    Only fastpath.py itself is read, so generate.py does not have to be there:
+
+    >>> import shutil, tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> filename = os.path.join(directory, 'fastpath.py')
+    >>> with open(filename, 'w') as file:
+    ...     _ = file.write('GENERATOR = {!r}\\n'.format(fastpathVersion))
+    >>> os.path.exists(os.path.join(directory, 'generate.py'))
+    False
+    >>> _loadFastpath(filename) is not None
+    True
+    >>> with open(filename, 'w') as file:
+    ...     _ = file.write('def eliminate(candidates):\\n    c = ')
+    >>> _loadFastpath(filename) is None
+    True
+    >>> shutil.rmtree(directory)
+    """
+    if not os.path.exists(filename):
+        return None
+    try:
+        spec = importlib.util.spec_from_file_location('fastpath', filename)
+        fastpath = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(fastpath)
+    except (OSError, SyntaxError, ImportError):
+        return None
+    if getattr(fastpath, 'GENERATOR', None) != fastpathVersion:
+        return None
+    return fastpath
+
+fastpath = _loadFastpath()  # straight-line techniques written out by generate.py
+
 def kandidates(db):
     """Returns a dictionary of each 81 squares as key and a string of
     '123456789' if square is blank or the string of value itself
@@ -52,179 +126,474 @@ def isSolved(candidates):
             return False
     return True
 
-def eliminate(candidates):
-    """Single Possibility Rule: Returns a dictionary of possible candidates (value)
-    for each square (key) after eliminating impossible candidates by
-    excluding any value from the square's SOLVED peers.
+def isConsistent(candidates):
+    """Returns False if any square has no possible candidates left or if
+    two solved squares in the same row, column, or box have the same value,
+    else True.
 
     candidates: dictionary
-    result: dictionary
-        key: string of points
-        value: string of possible candidates
+    result: boolean
     """
-    solvedPoints = [point for point in candidates if len(candidates[point]) == 1]  # list of solved points
-    for point in solvedPoints:
-        for peer in peers[point]:
-            value = candidates[point]
-            candidates[peer] = candidates[peer].replace(value,'')  # eliminating value from solved peer
-    return candidates
+    for unit in _units:
+        values = [candidates[point] for point in unit if len(candidates[point]) < 2]
+        if '' in values or len(set(values)) != len(values):
+            return False
+    return True
 
-def slicing(candidates):
-    """Slicing Dicing / Hidden Singles Method: Returns a dictionary of
-    possible candidates (value) for each square (key) by assigning a value, say x,
-    to a square if such square is the only point within its box that contains x.
+class Solver(object):
+    """This is a Solver class that runs the solving techniques on
+    a Sudoku board with its own settings.
 
-    candidates: dictionary
-    result: dictionary
-        key: string of points
-        value: string of possible candidates
+    The board topology (squares, peers, boxes, and subgroups) is built
+    once for the module and only ever read, so any number of Solvers can
+    share it. Each call to solve works on its own candidates dictionary,
+    which means that one Solver can be used by many threads at once; the
+    only shared state a Solver changes is its statistics, which is guarded
+    by a lock. The scratch dictionary that a pass is compared against is
+    kept per Solver AND per thread, so it is allocated once per thread
+    instead of on every pass, without threads writing over each other's.
+
+    techniques: tuple of technique names, run in the given order on each pass
+    passes: the most number of passes over the techniques before giving up,
+            or None for no limit
+    engine: name of the engine: 'logic' runs the passes only, while 'search'
+            also tries each candidate of the square with the fewest of them
+            whenever the passes get stuck
+    guesses: the most number of guesses the 'search' engine makes on one board
+             before giving up, or None for no limit
+    generated: whether to use the techniques from fastpath.py when it was written
+               for the current fastpathVersion; they give the same results as the ones here
+
+    >>> from preprocess import sudoku_data
+    >>> database = sudoku_data()
+    >>> generic = [Solver(generated=False).attempt(db) for db in database]
+    >>> generic == [Solver().attempt(db) for db in database]
+    True
+    >>> sum(isSolved(candidates) for candidates in generic)
+    48
+
+    A board without a solution makes the 'search' engine give up after its
+    guesses, so it runs at most passes for the board and for each guess:
+
+    >>> from preprocess import sudoku_process
+    >>> board = '.....5.8....6.1.43..........1.5........1.6...3.......553.....61........4.........'
+    >>> search = Solver(engine='search')
+    >>> search.solve(sudoku_process(board.replace('.', '0'))) is None
+    True
+    >>> search.stats()['passes'] <= (search.guesses + 1) * search.passes
+    True
     """
-    for point in candidates:
+    techniqueNames = ('eliminate', 'slicing', 'subgroupRowsExclusion',
+                      'subgroupColumnsExclusion', 'nakedpairs')
+    engineNames = ('logic', 'search')
+
+    def __init__(self, techniques=techniqueNames, passes=30, engine='logic', generated=True,
+                 guesses=100):
+        for name in techniques:
+            assert name in self.techniqueNames, "Unknown technique {}!".format(name)
+        assert passes is None or passes >= 0, "The number of passes cannot be negative."
+        assert engine in self.engineNames, "Unknown engine {}!".format(engine)
+        assert guesses is None or guesses >= 0, "The number of guesses cannot be negative."
+        self.techniques = tuple(techniques)
+        self.passes = passes
+        self.engine = engine
+        self.guesses = guesses
+        self.generated = generated and fastpath is not None
+        # bound methods are looked up once here instead of on every pass
+        self._pipeline = tuple(self._technique(name) for name in self.techniques)
+        self._hinters = tuple(getattr(self, '_hint_' + name) for name in self.techniques)
+        self._engine = getattr(self, '_' + engine)
+        self._lock = threading.Lock()
+        self._stats = {'solved': 0, 'unsolved': 0, 'passes': 0}
+        self._scratch = threading.local()
+        self._scratch.before = dict.fromkeys(squares, '')
+
+    def __repr__(self):
+        return "Solver(techniques={}, passes={}, engine={!r}, generated={}, guesses={})".format(
+            self.techniques, self.passes, self.engine, self.generated, self.guesses)
+
+    def _technique(self, name):
+        if self.generated and hasattr(fastpath, name):
+            return getattr(fastpath, name)
+        return getattr(self, name)
+
+    def stats(self):
+        """Returns a copy of the statistics of this Solver: the number
+        of solved and unsolved boards and the total number of passes run.
+
+        result: dictionary
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, solved, passes):
+        with self._lock:
+            self._stats['solved' if solved else 'unsolved'] += 1
+            self._stats['passes'] += passes
+
+    def eliminate(self, candidates):
+        """Single Possibility Rule: Returns a dictionary of possible candidates (value)
+        for each square (key) after eliminating impossible candidates by
+        excluding any value from the square's SOLVED peers.
+
+        candidates: dictionary
+        result: dictionary
+            key: string of points
+            value: string of possible candidates
+        """
+        solvedPoints = [point for point in candidates if len(candidates[point]) == 1]  # list of solved points
+        for point in solvedPoints:
+            for peer in peers[point]:
+                value = candidates[point]
+                candidates[peer] = candidates[peer].replace(value,'')  # eliminating value from solved peer
+        return candidates
+
+    def slicing(self, candidates):
+        """Slicing Dicing / Hidden Singles Method: Returns a dictionary of
+        possible candidates (value) for each square (key) by assigning a value, say x,
+        to a square if such square is the only point within its box that contains x.
+
+        candidates: dictionary
+        result: dictionary
+            key: string of points
+            value: string of possible candidates
+        """
+        for point in candidates:
+            for value in candidates[point]:
+                values = ''  # string of all possible candidates in squares of point's box excluding itself
+                for box in boxes[point]:
+                    values += candidates[box]
+                if value not in values:  # point is the only square within box with value as its candidate(s)
+                    candidates[point] = value  # that point must be filled with value
+        return candidates
+
+    def _subgroupExclusion(self, candidates, subgroups):
+        """Runs subgroup exclusion for every subgroup in subgroups, a list
+        built as _subgroupsRows or _subgroupsColumns.
+        """
+        for subgroup,linegroup,boxgroup in subgroups:
+            subgroupValues = ''  # the candidate numbers within subgroup points
+            for subgroupPoint in subgroup:
+                subgroupValues += candidates[subgroupPoint]
+            linegroupValues = ''  # the candidate numbers within points of same row/column as subgroup
+            for linegroupPoint in linegroup:
+                linegroupValues += candidates[linegroupPoint]
+            # Construct a set of value(s) in subgroup but NOT in other squares within the same row/column
+            values = set(map(int,subgroupValues)).difference(set(map(int,linegroupValues)))
+            for value in values:
+                for boxgroupPoint in boxgroup:
+                    # Remove such value(s) from candidates of squares within same box as subgroup
+                    candidates[boxgroupPoint] = candidates[boxgroupPoint].replace(str(value), '')
+
+            # Iterate the process in reverse order
+            boxgroupValues = ''  # the candidate numbers within points of same box as subgroup
+            for boxgroupPoint in boxgroup:
+                boxgroupValues += candidates[boxgroupPoint]
+            # Construct a set of value(s) in subgroup but NOT in other squares within the same box
+            values = set(map(int,subgroupValues)).difference(set(map(int,boxgroupValues)))
+            for value in values:
+                for linegroupPoint in linegroup:
+                    # Remove such value(s) from candidates of squares within same row/column as subgroup
+                    candidates[linegroupPoint] = candidates[linegroupPoint].replace(str(value), '')
+        return candidates
+
+    def subgroupRowsExclusion(self, candidates):
+        """Subgroup Exclusion by Row: Returns a dictionary of possible candidates (value)
+        for each square (key) by eliminating possible candidates via subgroup exclusion.
+        Given a subgroup (a group of two or three squares within SAME box), in this case by row,
+        if a given candidate value, say x, within the subgroup does not appear in any of the candidates
+        of the squares within the same row, then x cannot be one of the possible candidates for squares
+        within the subgroup's box, of course excluding the subgroup squares themselves. The reverse is true
+        if we look for candidate x within squares of same box and work our way through the squares in the row.
+        Refer to README for further details, for this method is difficult to grasp.
+
+        candidates: dictionary
+        result: dictionary
+            key: string of points
+            value: string of possible candidates
+        """
+        return self._subgroupExclusion(candidates, _subgroupsRows)
+
+    def subgroupColumnsExclusion(self, candidates):
+        """Subgroup Exclusion by Column: Returns a dictionary of possible candidates (value)
+        for each square (key) by eliminating possible candidates via subgroup exclusion.
+        The same rule as subgroupRowsExclusion applies, with columns in place of rows.
+
+        candidates: dictionary
+        result: dictionary
+            key: string of points
+            value: string of possible candidates
+        """
+        return self._subgroupExclusion(candidates, _subgroupsColumns)
+
+    def nakedpairs(self, candidates):
+        """Naked Pairs (Triplets, Quartets) Elimination: Returns a dictionary of possible candidates (value)
+        for each square (key) by eliminating possible candidates via naked pairs principle.
+        Given a region (row, column, or box) if a pair of numbers, say x and y, only appear in TWO squares,
+        then no other squares within its region and POTENTIALLY other interacting region cannot have x and y
+        as their possible candidates.
+        This principle can apply for triplet, or even quartet, of numbers given that there are three or four
+        squares, respectively, that have the same combination of numbers.
+        Refer to README for further details, for this method will take more words to explain.
+
+        candidates: dictionary
+        result: dictionary
+            key: string of points
+            value: string of possible candidates
+        """
+        for row in rowify(candidates):  # convert candidates to be ordered by rows
+            flipped = flipify(row)  # flip the dictionary so that its keys are the values and vice versa
+            # Construct a dictionary of pair/triplet/quartet numbers corresponding to the points that have such combinations
+            nakedrowpairs = {key:value for key,value in flipped.items() if len(value) > 1 and len(value) == len(key)}
+            for pairNum,pairs in nakedrowpairs.items():
+                rowReference = pairs[0][0]  # rowReference indicates which row the pair is in
+                for point in _rowDict[rowReference]:
+                    for num in pairNum:
+                        if point not in pairs:
+                            candidates[point] = candidates[point].replace(num,'')
+
+        # The same format of iteration applies for columns
+        for column in columnify(candidates):
+            flipped = flipify(column)
+            nakedcolumnpairs = {key:value for key,value in flipped.items() if len(value)>1 and len(value) == len(key)}
+            for pairNum,pairs in nakedcolumnpairs.items():
+                columnReference = pairs[0][1]
+                for point in _columnDict[columnReference]:
+                    for num in pairNum:
+                        if point not in pairs:
+                            candidates[point] = candidates[point].replace(num,'')
+
+        # This is implemented for two reasons:
+        # 1) The pair/triplet/quartet of numbers may not appear in the same
+        #    row or column, that is they are adjacent diagonally.
+        # 2) If the pair/triplet/quarter appear in a row or column and
+        #    are in the same box, then the elimination principle should
+        #    apply for squares within the same box, which was not implemented
+        #    in the previous two iterations.
+        for box in boxify(candidates):
+            flipped = flipify(box)
+            nakedboxpairs = {key:value for key,value in flipped.items() if len(value)>1 and len(value) == len(key)}
+            for pairNum,pairs in nakedboxpairs.items():
+                boxReference = pairs[0]
+                for point in boxes[boxReference]:
+                    for num in pairNum:
+                        if point not in pairs:
+                            candidates[point] = candidates[point].replace(num,'')
+        return candidates
+
+    def _hint(self, technique, points, changes):
+        return {'technique': technique, 'points': points, 'changes': changes}
+
+    def _hint_eliminate(self, candidates):
+        for point in squares:
+            value = candidates[point]
+            if len(value) != 1:
+                continue
+            changes = {peer: candidates[peer].replace(value,'')
+                       for peer in _peerList[point] if value in candidates[peer]}
+            if changes:
+                return self._hint('eliminate', [point], changes)
+        return None
+
+    def _hint_slicing(self, candidates):
+        for unit in _units:
+            solvedValues = ''.join(candidates[point] for point in unit if len(candidates[point]) == 1)
+            unsolvedValues = ''.join(candidates[point] for point in unit if len(candidates[point]) > 1)
+            for value in '123456789':
+                if unsolvedValues.count(value) == 1 and value not in solvedValues:
+                    for point in unit:
+                        if value in candidates[point]:
+                            return self._hint('slicing', [point], {point: value})
+        return None
+
+    def _hint_subgroup(self, technique, candidates, subgroups, siblings):
+        # the candidates of each subgroup are put together once for this call
+        subgroupValues = [set(''.join(candidates[point] for point in subgroup[0])) for subgroup in subgroups]
+        for index,(inLine,inBox) in enumerate(siblings):
+            lineValues = subgroupValues[inLine[0]] | subgroupValues[inLine[1]]
+            boxValues = subgroupValues[inBox[0]] | subgroupValues[inBox[1]]
+            subgroup,linegroup,boxgroup = subgroups[index]
+            # values locked into the subgroup by its row/column clear the box, and the reverse
+            for insideValues,outside,outsideValues in ((lineValues, boxgroup, boxValues),
+                                                        (boxValues, linegroup, lineValues)):
+                values = subgroupValues[index] - insideValues
+                if values.isdisjoint(outsideValues):
+                    continue
+                changes = dict()
+                for point in sorted(outside):
+                    remaining = ''.join(v for v in candidates[point] if v not in values)
+                    if remaining != candidates[point]:
+                        changes[point] = remaining
+                return self._hint(technique, list(subgroup), changes)
+        return None
+
+    def _hint_subgroupRowsExclusion(self, candidates):
+        return self._hint_subgroup('subgroupRowsExclusion', candidates, _subgroupsRows, _siblingsRows)
+
+    def _hint_subgroupColumnsExclusion(self, candidates):
+        return self._hint_subgroup('subgroupColumnsExclusion', candidates, _subgroupsColumns, _siblingsColumns)
+
+    def _hint_nakedpairs(self, candidates):
+        for unit in _units:
+            flipped = dict()  # as flipify, but only for squares with 2 or more candidates
+            for point in unit:
+                if len(candidates[point]) > 1:
+                    flipped.setdefault(candidates[point], []).append(point)
+            for pairNum,pairs in flipped.items():
+                if len(pairs) != len(pairNum):
+                    continue
+                changes = dict()
+                for point in unit:
+                    if point in pairs:
+                        continue
+                    remaining = ''.join(v for v in candidates[point] if v not in pairNum)
+                    if remaining != candidates[point]:
+                        changes[point] = remaining
+                if changes:
+                    return self._hint('nakedpairs', pairs, changes)
+        return None
+
+    def next_hint(self, board):
+        """Returns the next logical step on board, trying the techniques of this
+        Solver from the cheapest to the most expensive one and stopping at the
+        first one that places a value or removes a candidate.
+
+        board: Sudoku dictionary with 0 for blank squares, or a dictionary of
+               possible candidates as used by the solving techniques
+        result: dictionary, or None if no technique can make progress
+            'technique': name of the technique, as in Solver.techniqueNames
+            'points': list of squares that the step follows from
+            'changes': dictionary of squares and their new possible candidates,
+                       which can be applied with candidates.update(changes)
+
+        >>> from preprocess import sudoku_data
+        >>> database = sudoku_data()
+        >>> hint = Solver().next_hint(database[0])
+        >>> hint['technique'], hint['points'], hint['changes']['A1']
+        ('eliminate', ['A3'], '12456789')
+        >>> candidates = kandidates(database[6])
+        >>> hint = Solver().next_hint(candidates)
+        >>> while hint is not None:
+        ...     candidates.update(hint['changes'])
+        ...     hint = Solver().next_hint(candidates)
+        >>> isSolved(candidates), Solver().next_hint(candidates)
+        (False, None)
+        """
+        candidates = kandidates(board) if '0' in board.values() else board
+        for technique in self._hinters:
+            hint = technique(candidates)
+            if hint is not None:
+                return hint
+        return None
+
+    def _logic(self, candidates):
+        """Runs the technique pipeline on candidates for at most self.passes
+        passes. Since every technique only depends on candidates, a pass that
+        changes nothing means that no later pass will either, so we stop there.
+
+        result: (candidates, number of passes run, whether it stalled), where
+                stalled means the last pass changed nothing, as opposed to
+                running out of passes while still making progress
+        """
+        before = getattr(self._scratch, 'before', None)
+        if before is None:  # first pass of this Solver in this thread
+            before = self._scratch.before = dict.fromkeys(squares, '')
+        counter = itertools.count() if self.passes is None else range(self.passes)
+        for count in counter:
+            before.update(candidates)
+            for technique in self._pipeline:
+                candidates = technique(candidates)
+            if candidates == before:
+                return candidates, count + 1, True
+        return candidates, self.passes, False
+
+    def _search(self, candidates):
+        """Runs the technique pipeline on candidates, and if that does not
+        solve the board, tries each candidate of the unsolved square with the
+        fewest candidates in turn until one of them leads to a solution.
+        After self.guesses guesses in all, it gives up and returns the
+        candidates from before the first guess.
+
+        result: (candidates, number of passes run, whether it stalled)
+        """
+        budget = [self.guesses]  # guesses left, shared by the whole search tree
+        return self._guess(candidates, budget)
+
+    def _guess(self, candidates, budget):
+        candidates, count, stalled = self._logic(candidates)
+        if not isConsistent(candidates):
+            return candidates, count, stalled
+        unsolved = [point for point in squares if len(candidates[point]) > 1]
+        if not unsolved:
+            return candidates, count, stalled
+        point = min(unsolved, key=lambda point: len(candidates[point]))
         for value in candidates[point]:
-            values = ''  # string of all possible candidates in squares of point's box excluding itself
-            for box in boxes[point]:
-                values += candidates[box]
-            if value not in values:  # point is the only square within box with value as its candidate(s)
-                candidates[point] = value  # that point must be filled with value
-    return candidates
+            if budget[0] is not None:
+                if budget[0] == 0:
+                    break
+                budget[0] -= 1
+            guess = dict(candidates)
+            guess[point] = value
+            guess, guessCount, guessStalled = self._guess(guess, budget)
+            count += guessCount
+            if isSolved(guess) and isConsistent(guess):
+                return guess, count, guessStalled
+        return candidates, count, stalled
 
-def subgroupRowsExclusion(candidates):
-    """Subgroup Exclusion by Row: Returns a dictionary of possible candidates (value)
-    for each square (key) by eliminating possible candidates via subgroup exclusion.
-    Given a subgroup (a group of two or three squares within SAME box), in this case by row,
-    if a given candidate value, say x, within the subgroup does not appear in any of the candidates
-    of the squares within the same row, then x cannot be one of the possible candidates for squares
-    within the subgroup's box, of course excluding the subgroup squares themselves. The reverse is true
-    if we look for candidate x within squares of same box and work our way through the squares in the row.
-    Refer to README for further details, for this method is difficult to grasp.
+    def run(self, db):
+        """Runs the engine on the Sudoku db, which may also be a dictionary of
+        possible candidates to carry on from (it is copied, not changed).
 
-    candidates: dictionary
-    result: dictionary
-        key: string of points
-        value: string of possible candidates
-    """
-    for subrow in subgroupsRows().keys():  # subgroup is given as a string repr of list of three points
-        subrowValues = ''  # the candidate numbers within subgroup points
-        for subrowPoint in ast.literal_eval(subrow):  # ast.literal_eval to evaluate the string repr of list
-            subrowValues += candidates[subrowPoint]
-        rowgroupValues = ''  # the candidate numbers within points of same row as subgroup
-        for rowgroupPoint in subgroupsRows()[subrow]:
-            rowgroupValues += candidates[rowgroupPoint]
-        # Construct a set of value(s) in subgroup but NOT in other squares within the same row
-        values = set(map(int,subrowValues)).difference(set(map(int,rowgroupValues)))
-        for value in values:
-            for rowboxPoint in boxgroupsRows()[subrow]:
-                # Remove such value(s) from candidates of squares within same box as subgroup
-                candidates[rowboxPoint] = candidates[rowboxPoint].replace(str(value), '')
-
-        # Iterate the process in reverse order
-        boxgroupValues = ''  # the candidate numbers within points of same box as subgroup
-        for boxgroupPoint in boxgroupsRows()[subrow]:
-            boxgroupValues += candidates[boxgroupPoint]
-        # Construct a set of value(s) in subgroup but NOT in other squares within the same box
-        values = set(map(int,subrowValues)).difference(set(map(int,boxgroupValues)))
-        for value in values:
-            for subrowPoint in subgroupsRows()[subrow]:
-                # Remove such value(s) from candidates of squares within same row as subgroup
-                candidates[subrowPoint] = candidates[subrowPoint].replace(str(value), '')
-
-    return candidates
+        db: initial Sudoku dictionary processed from sudoku_data method
+        result: (candidates, number of passes run, whether it stalled), where
+                stalled means that the techniques could make no more progress,
+                as opposed to running out of passes
+        """
+        candidates, count, stalled = self._engine(kandidates(db))
+        self._record(isSolved(candidates), count)
+        return candidates, count, stalled
 
-def subgroupColumnsExclusion(candidates):
-    """Subgroup Exclusion by Column: Returns a dictionary of possible candidates (value)
-    for each square (key) by eliminating possible candidates via subgroup exclusion.
-    Given a subgroup (a group of two or three squares within SAME box), in this case by column,
-    if a given candidate value, say x, within the subgroup does not appear in any of the candidates
-    of the squares within the same column, then x cannot be one of the possible candidates for squares
-    within the subgroup's box, of course excluding the subgroup squares themselves. The reverse is true
-    if we look for candidate x within squares of same box and work our way through the squares in the column.
-    Refer to README for further details, for this method is difficult to grasp.
+    def _run(self, db):
+        candidates = self.run(db)[0]
+        return candidates, isSolved(candidates)
 
-    candidates: dictionary
-    result: dictionary
-        key: string of points
-        value: string of possible candidates
-    """
-    for subcolumn in subgroupsColumns().keys():
-        subcolumnValues = ''  # the candidate numbers within subgroup points
-        for subcolumnPoint in ast.literal_eval(subcolumn):
-            subcolumnValues += candidates[subcolumnPoint]
-        columngroupValues = ''  # the candidate numbers within points of same column as subgroup
-        for columngroupPoint in subgroupsColumns()[subcolumn]:
-            columngroupValues += candidates[columngroupPoint]
-        # Construct a set of value(s) in subgroup but NOT in other squares within the same column
-        values = set(map(int,subcolumnValues)).difference(set(map(int,columngroupValues)))
-        for value in values:
-            for columnboxPoint in boxgroupsColumns()[subcolumn]:
-                # Remove such value(s) from candidates of squares within same box as subgroup
-                candidates[columnboxPoint] = candidates[columnboxPoint].replace(str(value), '')
-
-        # Iterate the process in reverse order
-        boxgroupValues = ''  # the candidate numbers within points of same box as subgroup
-        for boxgroupPoint in boxgroupsColumns()[subcolumn]:
-            boxgroupValues += candidates[boxgroupPoint]
-        # Construct a set of value(s) in subgroup but NOT in other squares within the same box
-        values = set(map(int,subcolumnValues)).difference(set(map(int,boxgroupValues)))
-        for value in values:
-            for subcolumnPoint in subgroupsColumns()[subcolumn]:
-                # Remove such value(s) from candidates of squares within same column as subgroup
-                candidates[subcolumnPoint] = candidates[subcolumnPoint].replace(str(value), '')
-    return candidates
+    def attempt(self, db):
+        """Runs the engine on the Sudoku db and returns the candidates
+        dictionary it ends with, solved or not.
 
-def nakedpairs(candidates):
-    """Naked Pairs (Triplets, Quartets) Elimination: Returns a dictionary of possible candidates (value)
-    for each square (key) by eliminating possible candidates via naked pairs principle.
-    Given a region (row, column, or box) if a pair of numbers, say x and y, only appear in TWO squares,
-    then no other squares within its region and POTENTIALLY other interacting region cannot have x and y
-    as their possible candidates.
-    This principle can apply for triplet, or even quartet, of numbers given that there are three or four
-    squares, respectively, that have the same combination of numbers.
-    Refer to README for further details, for this method will take more words to explain.
+        db: initial Sudoku dictionary processed from sudoku_data method
+        result: dictionary
+        """
+        return self._run(db)[0]
 
-    candidates: dictionary
-    result: dictionary
-        key: string of points
-        value: string of possible candidates
-    """
-    for row in rowify(candidates):  # convert candidates to be ordered by rows
-        flipped = flipify(row)  # flip the dictionary so that its keys are the values and vice versa
-        # Construct a dictionary of pair/triplet/quartet numbers corresponding to the points that have such combinations
-        nakedrowpairs = {key:value for key,value in flipped.items() if len(value) > 1 and len(value) == len(key)}
-        for pairNum,pairs in nakedrowpairs.items():
-            rowReference = pairs[0][0]  # rowReference indicates which row the pair is in
-            for point in rowDict()[rowReference]:
-                for num in pairNum:
-                    if point not in pairs:
-                        candidates[point] = candidates[point].replace(num,'')
-
-    # The same format of iteration applies for columns
-    for column in columnify(candidates):
-        flipped = flipify(column)
-        nakedcolumnpairs = {key:value for key,value in flipped.items() if len(value)>1 and len(value) == len(key)}
-        for pairNum,pairs in nakedcolumnpairs.items():
-            columnReference = pairs[0][1]
-            for point in columnDict()[columnReference]:
-                for num in pairNum:
-                    if point not in pairs:
-                        candidates[point] = candidates[point].replace(num,'')
-
-    # This is implemented for two reasons:
-    # 1) The pair/triplet/quartet of numbers may not appear in the same
-    #    row or column, that is they are adjacent diagonally.
-    # 2) If the pair/triplet/quarter appear in a row or column and
-    #    are in the same box, then the elimination principle should
-    #    apply for squares within the same box, which was not implemented
-    #    in the previous two iterations.
-    for box in boxify(candidates):
-        flipped = flipify(box)
-        nakedboxpairs = {key:value for key,value in flipped.items() if len(value)>1 and len(value) == len(key)}
-        for pairNum,pairs in nakedboxpairs.items():
-            boxReference = pairs[0]
-            for point in boxes[boxReference]:
-                for num in pairNum:
-                    if point not in pairs:
-                        candidates[point] = candidates[point].replace(num,'')
-    return candidates
+    def solve(self, db):
+        """Attempts to solve the Sudoku db.
+
+        db: initial Sudoku dictionary processed from sudoku_data method
+        result: solved sudoku if solved else None
+        """
+        candidates, solved = self._run(db)
+        return candidates if solved else None
+
+def eliminate(candidates):
+    """Single Possibility Rule, see Solver.eliminate."""
+    return _default.eliminate(candidates)
+
+def slicing(candidates):
+    """Slicing Dicing / Hidden Singles Method, see Solver.slicing."""
+    return _default.slicing(candidates)
+
+def subgroupRowsExclusion(candidates):
+    """Subgroup Exclusion by Row, see Solver.subgroupRowsExclusion."""
+    return _default.subgroupRowsExclusion(candidates)
+
+def subgroupColumnsExclusion(candidates):
+    """Subgroup Exclusion by Column, see Solver.subgroupColumnsExclusion."""
+    return _default.subgroupColumnsExclusion(candidates)
+
+def nakedpairs(candidates):
+    """Naked Pairs (Triplets, Quartets) Elimination, see Solver.nakedpairs."""
+    return _default.nakedpairs(candidates)
 
 def hiddenpairs(candidates):
     pass
@@ -232,50 +601,39 @@ def hiddenpairs(candidates):
 def XWings(candidates):
     pass
 
+_default = Solver()  # shared by the module-level functions
+_unbounded = Solver(passes=None)
+
 def solve(db):
     """This function should run all of the previous functions to solve Sudoku.
+    Unlike safesolve, there is no limit on the number of passes.
 
-    result: solved sudoku
+    result: solved sudoku, or the last attempt if it can't be solved
     """
-    candidates = kandidates(db)
-    while not isSolved(candidates):
-        candidates = eliminate(candidates)
-        candidates = slicing(candidates)
-        candidates = subgroupRowsExclusion(candidates)
-        candidates = subgroupColumnsExclusion(candidates)
-        candidates = nakedpairs(candidates)
-    return candidates
+    return _unbounded.attempt(db)
 
 def safesolve(db):
     """This function should run all of the previous functions to solve Sudoku.
 
     result: solved sudoku if solved else None
     """
-    candidates = kandidates(db)
-    for _ in range(30):
-        candidates = eliminate(candidates)
-        candidates = slicing(candidates)
-        candidates = subgroupRowsExclusion(candidates)
-        candidates = subgroupColumnsExclusion(candidates)
-        candidates = nakedpairs(candidates)
-    if not isSolved(candidates):
-        return None
-    else:
-        return candidates
+    return _default.solve(db)
 
 def countsolve(db):
     """This function should run all of the previous functions to solve Sudoku.
 
     result: 1 if sudoku is solved else 0
     """
-    candidates = kandidates(db)
-    for _ in range(30):
-        candidates = eliminate(candidates)
-        candidates = slicing(candidates)
-        candidates = subgroupRowsExclusion(candidates)
-        candidates = subgroupColumnsExclusion(candidates)
-        candidates = nakedpairs(candidates)
-    if not isSolved(candidates):
-        return 0
-    else:
-        return 1
\ No newline at end of file
+    return 0 if _default.solve(db) is None else 1
+
+def next_hint(board):
+    """Returns the next logical step on board, see Solver.next_hint.
+
+    result: dictionary of 'technique', 'points', and 'changes', or None
+    """
+    return _default.next_hint(board)
+
+# The following code tests the Solver when run as a script:
+if __name__ == '__main__':
+    from doctest import testmod
+    testmod()